@@ -7,12 +7,29 @@ import pathlib
 GINGKO_INPUT_DIR = pathlib.Path(os.getenv("GINGKO_INPUT_DIR", "/mnt/data"))
 GINGKO_LOGGING_DIR = pathlib.Path(os.getenv("GINGKO_LOGGING_DIR", "/var/log/gingko"))
 
+# Kept at 64 KiB or more, as hashlib only releases the GIL when hashing large buffers.
+GINGKO_HASH_CHUNK_SIZE = max(64 * 1024, int(os.getenv("GINGKO_HASH_CHUNK_SIZE", 4 * 1024 * 1024)))
+GINGKO_FILE_STORE_WORKERS = int(os.getenv("GINGKO_FILE_STORE_WORKERS", os.cpu_count() or 1))
+GINGKO_UNPACKER_WORKERS = int(os.getenv("GINGKO_UNPACKER_WORKERS", os.cpu_count() or 1))
+GINGKO_WATCHER_WORKERS = int(os.getenv("GINGKO_WATCHER_WORKERS", "4"))
+GINGKO_UNPACKER_TLSH = os.getenv("GINGKO_UNPACKER_TLSH", "false").lower() == "true"
+GINGKO_UNPACKER_SSDEEP = os.getenv("GINGKO_UNPACKER_SSDEEP", "true").lower() == "true"
+
 GINGKO_REDIS_HOST = os.getenv("GINGKO_REDIS_HOST", "redis")
 GINGKO_REDIS_PORT = os.getenv("GINGKO_REDIS_PORT", "6379")
 GINGKO_REDIS = os.getenv("GINGKO_REDIS", f"redis://{GINGKO_REDIS_HOST}:{GINGKO_REDIS_PORT}")
+GINGKO_REDIS_MAX_CONNECTIONS = int(os.getenv("GINGKO_REDIS_MAX_CONNECTIONS", "32"))
+
+GINGKO_EXTRACTION_CACHE_TTL = float(os.getenv("GINGKO_EXTRACTION_CACHE_TTL", "1.0"))
 
 GINGKO_ELASTIC_HOST = os.getenv("GINGKO_ELASTIC_HOST", "elastic")
 GINGKO_ELASTIC_PORT = os.getenv("GINGKO_ELASTIC_PORT", "9200")
 GINGKO_ELASTIC = os.getenv("GINGKO_ELASTIC", f"http://{GINGKO_ELASTIC_HOST}:{GINGKO_ELASTIC_PORT}")
 GINGKO_ELASTIC_FILE_METADATA_INDEX = os.getenv("GINGKO_ELASTIC_FILE_METADATA_INDEX",
                                                "gingko-filestore")
+GINGKO_ELASTIC_FILE_METADATA_INDEX_EXPECTED_SIZE_GB = float(
+    os.getenv("GINGKO_ELASTIC_FILE_METADATA_INDEX_EXPECTED_SIZE_GB", "50"))
+GINGKO_ELASTIC_FILE_METADATA_INDEX_REPLICAS = int(
+    os.getenv("GINGKO_ELASTIC_FILE_METADATA_INDEX_REPLICAS", "1"))
+GINGKO_ELASTIC_FILE_METADATA_INDEX_REFRESH_INTERVAL = os.getenv(
+    "GINGKO_ELASTIC_FILE_METADATA_INDEX_REFRESH_INTERVAL", "1s")
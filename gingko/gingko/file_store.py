@@ -2,13 +2,25 @@
 stores their metadata in Elastic."""
 
 import abc
+import concurrent.futures
+import contextlib
 import hashlib
+import math
+import mmap
+import os
 import pathlib
-import shutil
+import typing
+import uuid
 
+import elasticsearch
+import elasticsearch.helpers
 import pydantic
-import ssdeep
 
+from gingko.config import (GINGKO_ELASTIC, GINGKO_ELASTIC_FILE_METADATA_INDEX,
+                           GINGKO_ELASTIC_FILE_METADATA_INDEX_EXPECTED_SIZE_GB,
+                           GINGKO_ELASTIC_FILE_METADATA_INDEX_REFRESH_INTERVAL,
+                           GINGKO_ELASTIC_FILE_METADATA_INDEX_REPLICAS, GINGKO_FILE_STORE_WORKERS,
+                           GINGKO_HASH_CHUNK_SIZE)
 from gingko.errors import GingkoError
 
 
@@ -30,6 +42,9 @@ class GingkoFileDataComponent(abc.ABC):
     def store_file(self, file: pathlib.Path) -> str:
         ...
 
+    def store_files(self, files: typing.Iterable[pathlib.Path]) -> list[str]:
+        return [self.store_file(file) for file in files]
+
     @abc.abstractmethod
     def retrieve_file(self, **kwargs) -> pathlib.Path:
         ...
@@ -41,6 +56,12 @@ class GingkoFileMetadataComponent(abc.ABC):
     def store_file_metadata(self, file_metadata: dict) -> str:
         ...
 
+    def store_file_metadata_bulk(self, file_metadata: typing.Iterable[dict]) -> list[str]:
+        return [self.store_file_metadata(metadata) for metadata in file_metadata]
+
+    def bulk_ingest(self) -> typing.ContextManager[None]:
+        return contextlib.nullcontext()
+
     @abc.abstractmethod
     def retrieve_file_metadata(self, **kwargs) -> dict:
         ...
@@ -50,32 +71,98 @@ class GingkoFileStore:
 
     def __init__(self, data_component: GingkoFileDataComponent,
                  metadata_component: GingkoFileMetadataComponent) -> None:
-        ...
+        self.data_component = data_component
+        self.metadata_component = metadata_component
 
     def store_file(self, file: pathlib.Path, file_metadata: dict) -> None:
-        ...
+        self.data_component.store_file(file)
+        self.metadata_component.store_file_metadata(file_metadata)
+
+    def store_files(self, files: list[pathlib.Path], file_metadata: list[dict]) -> None:
+        # Storing as a batch lets each component use its bulk path, rather than paying one
+        # metadata request per file.
+        self.data_component.store_files(files)
+
+        with self.metadata_component.bulk_ingest():
+            self.metadata_component.store_file_metadata_bulk(file_metadata)
 
 
 class LocalFileDataStore(GingkoFileDataComponent):
 
-    def __init__(self, file_store_root: pathlib.Path) -> None:
+    def __init__(self,
+                 file_store_root: pathlib.Path,
+                 workers: int = GINGKO_FILE_STORE_WORKERS) -> None:
         self.file_store_root = file_store_root
+        self.workers = workers
+
+        self.file_store_root.mkdir(exist_ok=True, parents=True)
+
+        # Sharding directories known to exist already, so they aren't re-created on every store.
+        self._known_dirs: set[pathlib.Path] = set()
+
+    def _iter_file_chunks(self, file_fp: typing.BinaryIO) -> typing.Iterator[bytes | memoryview]:
+
+        # Files that fit in a single read aren't worth mapping (and empty files can't be).
+        if os.fstat(file_fp.fileno()).st_size < GINGKO_HASH_CHUNK_SIZE:
+            if file_content := file_fp.read():
+                yield file_content
+            return
 
-    def _generate_sha1(self, file: pathlib.Path) -> str:
-        return hashlib.sha1(file.read_bytes()).hexdigest()
+        with mmap.mmap(file_fp.fileno(), 0, access=mmap.ACCESS_READ) as file_mm, \
+                memoryview(file_mm) as file_view:
+
+            if hasattr(mmap, "MADV_SEQUENTIAL"):
+                file_mm.madvise(mmap.MADV_SEQUENTIAL)
+
+            for offset in range(0, len(file_view), GINGKO_HASH_CHUNK_SIZE):
+                with file_view[offset:offset + GINGKO_HASH_CHUNK_SIZE] as chunk:
+                    yield chunk
 
     def _generate_file_path(self, file_hash: str) -> pathlib.Path:
         file_grandparent_dir = self.file_store_root / file_hash[:2]
         file_parent_dir = file_grandparent_dir / file_hash[2:4]
-        file_parent_dir.mkdir(exist_ok=True, parents=True)
+
+        if file_parent_dir not in self._known_dirs:
+            file_parent_dir.mkdir(exist_ok=True, parents=True)
+            self._known_dirs.add(file_parent_dir)
+
         return file_parent_dir / file_hash
 
     def store_file(self, file: pathlib.Path) -> str:
-        file_hash = self._generate_sha1(file)
-        stored_file_path = self._generate_file_path(file_hash)
-        shutil.copy(file, stored_file_path)
+        # Files are addressed by the same sha1 their metadata is keyed by in Elastic. The hash is
+        # only used for content addressing, and OpenSSL uses SHA-NI for it where the CPU has it.
+        file_hash = hashlib.sha1(usedforsecurity=False)
+
+        # The final path depends on the hash, so hash and copy in a single pass into a temporary
+        # file and rename it into place afterwards.
+        temp_file_path = self.file_store_root / f".{uuid.uuid4().hex}.tmp"
+
+        try:
+
+            with file.open("rb") as file_fp, temp_file_path.open("xb") as temp_fp:
+                for chunk in self._iter_file_chunks(file_fp):
+                    file_hash.update(chunk)
+                    temp_fp.write(chunk)
+
+            stored_file_path = self._generate_file_path(file_hash.hexdigest())
+
+            # The store is content addressed, so an existing file already holds these exact bytes.
+            if stored_file_path.exists():
+                temp_file_path.unlink()
+            else:
+                os.replace(temp_file_path, stored_file_path)
+
+        except BaseException:
+            temp_file_path.unlink(missing_ok=True)
+            raise
+
         return stored_file_path
 
+    def store_files(self, files: typing.Iterable[pathlib.Path]) -> list[str]:
+        # Hashing and copying both release the GIL, so threads are enough here.
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self.store_file, files))
+
     def retrieve_file(self, file_hash: str) -> pathlib.Path:
         stored_file_path = self._generate_file_path(file_hash)
 
@@ -83,3 +170,104 @@ class LocalFileDataStore(GingkoFileDataComponent):
             raise GingkoFileNotFound(file_hash)
 
         return stored_file_path
+
+
+class ElasticFileMetadataStore(GingkoFileMetadataComponent):
+
+    _BULK_THREAD_COUNT = 4
+    _BULK_CHUNK_SIZE = 500
+    _BULK_MAX_CHUNK_BYTES = 100 * 1024 * 1024
+    _MAX_SHARD_SIZE_GB = 50
+
+    def __init__(
+            self,
+            elastic: str = GINGKO_ELASTIC,
+            index: str = GINGKO_ELASTIC_FILE_METADATA_INDEX,
+            expected_index_size_gb: float = GINGKO_ELASTIC_FILE_METADATA_INDEX_EXPECTED_SIZE_GB,
+            number_of_replicas: int = GINGKO_ELASTIC_FILE_METADATA_INDEX_REPLICAS,
+            refresh_interval: str = GINGKO_ELASTIC_FILE_METADATA_INDEX_REFRESH_INTERVAL) -> None:
+        self.client = elasticsearch.Elasticsearch(elastic)
+        self.index = index
+        self.expected_index_size_gb = expected_index_size_gb
+        self.number_of_replicas = number_of_replicas
+        self.refresh_interval = refresh_interval
+
+        self.create_index()
+
+    def create_index(self) -> None:
+        if self.client.indices.exists(index=self.index):
+            return
+
+        # Keep shards at or below the recommended maximum size for the expected volume of metadata.
+        number_of_shards = max(1, math.ceil(self.expected_index_size_gb / self._MAX_SHARD_SIZE_GB))
+
+        self.client.indices.create(index=self.index,
+                                   settings={
+                                       "index.number_of_shards": number_of_shards,
+                                       "index.number_of_replicas": self.number_of_replicas,
+                                       "index.refresh_interval": self.refresh_interval
+                                   })
+
+    @contextlib.contextmanager
+    def bulk_ingest(self) -> typing.Iterator[None]:
+        # Replicas are dropped for the whole of an ingest run rather than per batch, as each change
+        # in replica count means rebuilding the replica shards from the whole index. The configured
+        # count is put back afterwards, rather than whatever was read beforehand, so overlapping
+        # runs can't leave the index without replicas.
+        self.client.indices.put_settings(index=self.index, settings={"index.number_of_replicas": 0})
+
+        try:
+            yield
+        finally:
+            self.client.indices.put_settings(
+                index=self.index, settings={"index.number_of_replicas": self.number_of_replicas})
+
+    @contextlib.contextmanager
+    def _bulk_indexing(self) -> typing.Iterator[None]:
+        # Refreshing while bulk loading slows ingestion down considerably, so it's switched off for
+        # the duration of a batch. As with replicas, the configured interval is restored afterwards
+        # rather than a snapshot that an overlapping batch may already have changed.
+        self.client.indices.put_settings(index=self.index,
+                                         settings={"index.refresh_interval": "-1"})
+
+        try:
+            yield
+        finally:
+            self.client.indices.put_settings(
+                index=self.index, settings={"index.refresh_interval": self.refresh_interval})
+
+    def store_file_metadata(self, file_metadata: dict) -> str:
+        self.client.index(index=self.index, id=file_metadata["sha1"], document=file_metadata)
+        return file_metadata["sha1"]
+
+    def store_file_metadata_bulk(self, file_metadata: typing.Iterable[dict]) -> list[str]:
+        file_hashes: list[str] = []
+
+        def generate_actions() -> typing.Iterator[dict]:
+            for metadata in file_metadata:
+                file_hashes.append(metadata["sha1"])
+                yield {
+                    "_op_type": "index",
+                    "_index": self.index,
+                    "_id": metadata["sha1"],
+                    "_source": metadata
+                }
+
+        with self._bulk_indexing():
+
+            # parallel_bulk is lazy, so its results have to be consumed for anything to be indexed.
+            for _ in elasticsearch.helpers.parallel_bulk(
+                    self.client,
+                    generate_actions(),
+                    thread_count=self._BULK_THREAD_COUNT,
+                    chunk_size=self._BULK_CHUNK_SIZE,
+                    max_chunk_bytes=self._BULK_MAX_CHUNK_BYTES):
+                pass
+
+        return file_hashes
+
+    def retrieve_file_metadata(self, file_hash: str) -> dict:
+        try:
+            return self.client.get(index=self.index, id=file_hash)["_source"]
+        except elasticsearch.NotFoundError as e:
+            raise GingkoFileNotFound(file_hash) from e
@@ -1,16 +1,24 @@
+import atexit
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 
 from gingko.config import GINGKO_LOGGING_DIR
 
 LOG_FILE = GINGKO_LOGGING_DIR / "gingko.log"
 LOG_FORMAT = "%(asctime)s:%(levelname)s:%(message)s"
 
-FILE_HANDLER = TimedRotatingFileHandler(filename=LOG_FILE, when="d", interval=1, backupCount=30)
-STREAM_HANDLER = logging.StreamHandler()
-
 
 def init_logger() -> None:
-    logging.basicConfig(handlers=[FILE_HANDLER, STREAM_HANDLER],
-                        format=LOG_FORMAT,
-                        level=logging.INFO)
+    # Handlers are only built here, so that importing this module doesn't open the log file.
+    file_handler = TimedRotatingFileHandler(filename=LOG_FILE, when="d", interval=1, backupCount=30)
+    stream_handler = logging.StreamHandler()
+
+    # Records are queued by the logging thread and written out by the listener's own thread, so
+    # callers never wait on disk or terminal writes.
+    log_queue = queue.SimpleQueue()
+    log_queue_listener = QueueListener(log_queue, file_handler, stream_handler)
+    log_queue_listener.start()
+    atexit.register(log_queue_listener.stop)
+
+    logging.basicConfig(handlers=[QueueHandler(log_queue)], format=LOG_FORMAT, level=logging.INFO)
@@ -1,18 +1,37 @@
 """Module containing pydantic models and associates types for the request and response forms issued
 to extraction API routes."""
 
-import pathlib
-from typing import Literal
+from typing import Annotated, Literal
+
+from pydantic import AfterValidator, BaseModel
+
+
+def normalise_path(path: str) -> str:
+    """Normalise a path the way str(PurePosixPath(path)) does, by dropping empty and "." segments,
+    without building a PurePath to do it.
+
+    Args:
+        path (str): Path to normalise.
+
+    Returns:
+        str: Normalised path.
+    """
+    normalised_path = "/".join(part for part in path.split("/") if part not in ("", "."))
+
+    if path.startswith("/"):
+        return "/" + normalised_path
+
+    return normalised_path or "."
 
-from pydantic import BaseModel
 
 ExtractionType = Literal["tar", "zip", "directory"]
+ExtractionPath = Annotated[str, AfterValidator(normalise_path)]
 
 
 class Extraction(BaseModel):
     """Model representing an extraction that is waiting for processing in the system."""
 
-    path: pathlib.PurePath
+    path: str
     type: ExtractionType
     size_on_disk: int
     files: int
@@ -20,7 +39,7 @@ class Extraction(BaseModel):
 
 class GetExtractionRequest(BaseModel):
     """Model for the GET /extraction request."""
-    path: pathlib.PurePath | None = None
+    path: ExtractionPath | None = None
     type: ExtractionType | None = None
 
 
@@ -31,7 +50,7 @@ class GetExtractionResponse(BaseModel):
 
 class DeleteExtractionRequest(BaseModel):
     """Model for the DELETE /extraction request."""
-    path: pathlib.PurePath
+    path: ExtractionPath
 
 
 class DeleteExtractionResponse(BaseModel):
@@ -1,50 +1,80 @@
 """Module containing the API router that handles extractions."""
 
-from fastapi import APIRouter, HTTPException
+import cachetools
+from fastapi import APIRouter, Depends, HTTPException
 
+from gingko.config import GINGKO_EXTRACTION_CACHE_TTL
 from gingko.server.extraction.model import GetExtractionRequest, GetExtractionResponse, Extraction, DeleteExtractionRequest, DeleteExtractionResponse
-from gingko.server.extraction.tracking import RedisGingkoTrackingClient
+from gingko.server.extraction.tracking import AsyncRedisGingkoTrackingClient
 
 extraction_router = APIRouter(prefix="/extraction")
 
+# Short-lived cache of extraction lookups, keyed by request filter, so that clients polling for
+# extractions don't each cause a fresh set of Redis reads.
+_EXTRACTION_CACHE = cachetools.TTLCache(maxsize=64, ttl=GINGKO_EXTRACTION_CACHE_TTL)
+
+
+def get_tracking_client() -> AsyncRedisGingkoTrackingClient:
+    """Dependency that provides route handlers with a tracking client.
+
+    Returns:
+        AsyncRedisGingkoTrackingClient: Tracking client backed by the shared Redis connection pool.
+    """
+    return AsyncRedisGingkoTrackingClient()
+
 
 @extraction_router.get("/")
-def get_extraction(req: GetExtractionRequest | None = None) -> GetExtractionResponse:
+async def get_extraction(
+    req: GetExtractionRequest | None = None,
+    tracking_client: AsyncRedisGingkoTrackingClient = Depends(get_tracking_client)
+) -> GetExtractionResponse:
     """.
 
     Args:
         req (GetExtractionRequest | None, optional): Request body, used for filtering. Defaults to 
         None.
+        tracking_client (AsyncRedisGingkoTrackingClient): Tracking client, provided by dependency.
 
     Returns:
         GetExtractionResponse: Request response, contains extractions.
     """
 
-    tracking_client = RedisGingkoTrackingClient()
+    cache_key = (req.path, req.type) if req else None
+
+    extractions: list[Extraction] | None = _EXTRACTION_CACHE.get(cache_key)
 
-    extractions: list[Extraction] = []
+    if extractions is not None:
+        return GetExtractionResponse(extractions=extractions)
+
+    extractions = []
 
     if not req:
 
-        extractions = tracking_client.get_tracked_extractions()
+        extractions = await tracking_client.get_tracked_extractions()
 
     elif req.path:
 
-        extractions = [tracking_client.get_tracked_extraction_data_by_path(req.path)]
+        extractions = [await tracking_client.get_tracked_extraction_data_by_path(req.path)]
 
     elif req.type:
 
-        extractions = tracking_client.get_tracked_extraction_data_by_type(req.type)
+        extractions = await tracking_client.get_tracked_extraction_data_by_type(req.type)
+
+    _EXTRACTION_CACHE[cache_key] = extractions
 
     return GetExtractionResponse(extractions=extractions)
 
 
 @extraction_router.delete("/")
-def delete_extraction(req: DeleteExtractionRequest) -> DeleteExtractionResponse:
+async def delete_extraction(
+    req: DeleteExtractionRequest,
+    tracking_client: AsyncRedisGingkoTrackingClient = Depends(get_tracking_client)
+) -> DeleteExtractionResponse:
     """Delete a specific extraction from the tracker.
 
     Args:
         req (DeleteExtractionRequest): Request body, used to select the extraction to delete.
+        tracking_client (AsyncRedisGingkoTrackingClient): Tracking client, provided by dependency.
 
     Raises:
         HTTPException: 404 raised in the event that the client tries to delete an extraction that
@@ -53,13 +83,13 @@ def delete_extraction(req: DeleteExtractionRequest) -> DeleteExtractionResponse:
     Returns:
         DeleteExtractionResponse: Request response, basically empty.
     """
-    tracking_client = RedisGingkoTrackingClient()
+    extraction = await tracking_client.get_tracked_extraction_data_by_path(req.path)
 
-    if not tracking_client.check_path_tracked(req.path):
+    if not extraction:
         raise HTTPException(status_code=404, detail="No extraction tracked with that path.")
 
-    extraction = tracking_client.get_tracked_extraction_data_by_path(req.path)
+    await tracking_client.remove_tracking_for_extraction(extraction)
 
-    tracking_client.remove_tracking_for_extraction(extraction)
+    _EXTRACTION_CACHE.clear()
 
     return {}
@@ -2,14 +2,85 @@
 tracking whether extractions on disk have been seen before or not."""
 
 import abc
-import pathlib
+import functools
+import itertools
+import typing
 
+import pydantic
 import redis
+import redis.asyncio
 
-from gingko.config import GINGKO_REDIS_HOST, GINGKO_REDIS_PORT
+from gingko.config import GINGKO_REDIS_HOST, GINGKO_REDIS_MAX_CONNECTIONS, GINGKO_REDIS_PORT
 from gingko.errors import GingkoError
 from gingko.server.extraction.model import Extraction, ExtractionType
 
+_EXTRACTION_LIST_ADAPTER = pydantic.TypeAdapter(list[Extraction])
+
+# Adds tracking for an extraction in one atomic step, unless its path is already tracked.
+# KEYS: tracking keys set, tracking type keys set, tracking data hash.
+# ARGV: extraction path, followed by the extraction data as field/value pairs.
+_ADD_TRACKING_SCRIPT = """
+if redis.call("SADD", KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call("SADD", KEYS[2], ARGV[1])
+redis.call("HSET", KEYS[3], unpack(ARGV, 2))
+return 1
+"""
+
+# Adds each of a batch of tracked extraction paths to the set for its type, skipping any that have
+# been removed since they were read.
+# ARGV: tracking data prefix, tracking type keys prefix, followed by the extraction paths.
+_BACKFILL_TRACKING_TYPE_KEYS_SCRIPT = """
+for i = 3, #ARGV do
+    local extraction_type = redis.call("HGET", ARGV[1] .. ARGV[i], "type")
+    if extraction_type then
+        redis.call("SADD", ARGV[2] .. extraction_type, ARGV[i])
+    end
+end
+return 0
+"""
+
+# Redis instances, by host and port, known to have had their per-type sets backfilled.
+_BACKFILLED_REDIS_INSTANCES: set[tuple[str, int]] = set()
+
+
+@functools.cache
+def _get_redis_connection_pool(host: str, port: int) -> redis.BlockingConnectionPool:
+    """Get the connection pool shared by all clients of a given Redis instance, so that clients
+    created per request reuse connections rather than each opening their own.
+
+    Args:
+        host (str): Hostname where Redis can be found.
+        port (int): Port that Redis is running on.
+
+    Returns:
+        redis.BlockingConnectionPool: Connection pool for that Redis instance.
+    """
+    return redis.BlockingConnectionPool(host=host,
+                                        port=port,
+                                        max_connections=GINGKO_REDIS_MAX_CONNECTIONS,
+                                        decode_responses=True,
+                                        encoding="utf-8")
+
+
+@functools.cache
+def _get_async_redis_connection_pool(host: str, port: int) -> redis.asyncio.BlockingConnectionPool:
+    """Get the asyncio connection pool shared by all async clients of a given Redis instance.
+
+    Args:
+        host (str): Hostname where Redis can be found.
+        port (int): Port that Redis is running on.
+
+    Returns:
+        redis.asyncio.BlockingConnectionPool: Connection pool for that Redis instance.
+    """
+    return redis.asyncio.BlockingConnectionPool(host=host,
+                                                port=port,
+                                                max_connections=GINGKO_REDIS_MAX_CONNECTIONS,
+                                                decode_responses=True,
+                                                encoding="utf-8")
+
 
 class GingkoTrackingError(GingkoError):
     ...
@@ -36,11 +107,11 @@ class GingkoTrackingClient(abc.ABC):
         ...
 
     @abc.abstractmethod
-    def check_path_tracked(self, path: pathlib.PurePath) -> bool:
-        """Check if the provided PurePath has been seen before.
+    def check_path_tracked(self, path: str) -> bool:
+        """Check if the provided path has been seen before.
 
         Args:
-            path (pathlib.PurePath): Path to check if it has been seen or not.
+            path (str): Path to check if it has been seen or not.
 
         Returns:
             bool: Whether or not the path has been seen by the system or not.
@@ -57,11 +128,11 @@ class GingkoTrackingClient(abc.ABC):
         ...
 
     @abc.abstractmethod
-    def get_tracked_extraction_data_by_path(self, path: pathlib.PurePath) -> Extraction:
+    def get_tracked_extraction_data_by_path(self, path: str) -> Extraction:
         """Get a specific extraction by path from the tracker.
 
         Args:
-            path (pathlib.PurePath): Path to get extraction for.
+            path (str): Path to get extraction for.
 
         Returns:
             Extraction: Extraction that corresponds to provided path.
@@ -90,12 +161,86 @@ class GingkoTrackingClient(abc.ABC):
         ...
 
 
-class RedisGingkoTrackingClient(GingkoTrackingClient):
-    """Implementation of the GingkoTrackingClient abstract class that uses Redis to store the
-    tracking information."""
+class AsyncGingkoTrackingClient(abc.ABC):
+    """Asyncio counterpart to GingkoTrackingClient, with the same methods as coroutines."""
+
+    @abc.abstractmethod
+    async def get_tracked_extractions(self) -> list[Extraction]:
+        ...
+
+    @abc.abstractmethod
+    async def check_path_tracked(self, path: str) -> bool:
+        ...
+
+    @abc.abstractmethod
+    async def remove_tracking_for_extraction(self, extraction: Extraction):
+        ...
+
+    @abc.abstractmethod
+    async def get_tracked_extraction_data_by_path(self, path: str) -> Extraction | None:
+        ...
+
+    @abc.abstractmethod
+    async def get_tracked_extraction_data_by_type(self, type: ExtractionType) -> list[Extraction]:
+        ...
+
+    @abc.abstractmethod
+    async def add_tracking_for_extraction(self, extraction: Extraction) -> None:
+        ...
+
+
+class _RedisTrackingLayout:
+    """Redis key layout shared by RedisGingkoTrackingClient and AsyncRedisGingkoTrackingClient,
+    along with building the keys and script arguments that both clients send."""
 
     _REDIS_TRACKING_KEYS_KEY = "gingko-tracking-keys"
     _REDIS_TRACKING_DATA_PREFIX = "gingko-tracking::"
+    _REDIS_TRACKING_TYPE_KEYS_PREFIX = "gingko-tracking-by-type::"
+    _REDIS_TRACKING_TYPE_KEYS_BACKFILLED_KEY = "gingko-tracking-by-type-backfilled"
+    _REDIS_SCAN_COUNT = 1000
+    _REDIS_PIPELINE_BATCH_SIZE = 256
+
+    def _get_tracking_data_key(self, path: str) -> str:
+        return f"{self._REDIS_TRACKING_DATA_PREFIX}{path}"
+
+    def _get_tracking_type_keys_key(self, extraction_type: ExtractionType) -> str:
+        return f"{self._REDIS_TRACKING_TYPE_KEYS_PREFIX}{extraction_type}"
+
+    def _parse_tracking_data(self, raw: dict[str, str]) -> Extraction | None:
+        return Extraction(**raw) if raw else None
+
+    def _get_add_tracking_script_params(self, extraction: Extraction) -> dict[str, list[str]]:
+        return {
+            "keys": [
+                self._REDIS_TRACKING_KEYS_KEY,
+                self._get_tracking_type_keys_key(extraction.type),
+                self._get_tracking_data_key(extraction.path)
+            ],
+            "args": [extraction.path, *itertools.chain.from_iterable(dict(extraction).items())]
+        }
+
+    def _iter_backfill_tracking_type_keys_script_params(
+            self, tracked_extraction_keys: typing.Iterable[str]) -> typing.Iterator[dict]:
+        for tracked_extraction_keys_batch in itertools.batched(tracked_extraction_keys,
+                                                               self._REDIS_PIPELINE_BATCH_SIZE):
+            yield {
+                "args": [
+                    self._REDIS_TRACKING_DATA_PREFIX, self._REDIS_TRACKING_TYPE_KEYS_PREFIX,
+                    *tracked_extraction_keys_batch
+                ]
+            }
+
+    def _queue_tracking_removal(self,
+                                pipeline: redis.client.Pipeline | redis.asyncio.client.Pipeline,
+                                extraction: Extraction) -> None:
+        pipeline.delete(self._get_tracking_data_key(extraction.path))
+        pipeline.srem(self._REDIS_TRACKING_KEYS_KEY, extraction.path)
+        pipeline.srem(self._get_tracking_type_keys_key(extraction.type), extraction.path)
+
+
+class RedisGingkoTrackingClient(_RedisTrackingLayout, GingkoTrackingClient):
+    """Implementation of the GingkoTrackingClient abstract class that uses Redis to store the
+    tracking information."""
 
     def __init__(self, host: str = GINGKO_REDIS_HOST, port: int = GINGKO_REDIS_PORT) -> None:
         """Constructor for the class.
@@ -104,10 +249,12 @@ class RedisGingkoTrackingClient(GingkoTrackingClient):
             host (str, optional): Hostname where Redis can be found. Defaults to GINGKO_REDIS_HOST.
             port (int, optional): Port that Reds is running on. Defaults to GINGKO_REDIS_PORT.
         """
-        self.connection = redis.StrictRedis(host=host,
-                                            port=port,
-                                            decode_responses=True,
-                                            charset="utf-8")
+        self.redis_instance = (host, int(port))
+        self.connection = redis.StrictRedis(
+            connection_pool=_get_redis_connection_pool(host, int(port)))
+        self._add_tracking_script = self.connection.register_script(_ADD_TRACKING_SCRIPT)
+        self._backfill_tracking_type_keys_script = self.connection.register_script(
+            _BACKFILL_TRACKING_TYPE_KEYS_SCRIPT)
 
     def get_tracked_extractions(self) -> list[Extraction]:
         """Get a list of all tracked extractions.
@@ -115,46 +262,84 @@ class RedisGingkoTrackingClient(GingkoTrackingClient):
         Returns:
             list[Extraction]: All extractions that are currently tracked.
         """
-        tracked_extraction_keys = self.connection.smembers(self._REDIS_TRACKING_KEYS_KEY)
+        return self._get_tracked_extraction_data_by_keys(self._REDIS_TRACKING_KEYS_KEY)
+
+    def _get_tracked_extraction_data_by_keys(self, tracking_keys_key: str) -> list[Extraction]:
+        """Get tracked Extraction data for every tracking key in a set. The set is walked with
+        SSCAN rather than SMEMBERS so that Redis isn't blocked building one large reply, and data
+        is fetched with pipelined HGETALLs, one round-trip per batch of keys.
+
+        Args:
+            tracking_keys_key (str): Key of the Redis set holding the tracking keys (extraction
+            paths) to get data for.
+
+        Returns:
+            list[Extraction]: Extraction tracking data for each key.
+        """
+        raws: list[dict[str, str]] = []
+        seen_tracked_extraction_keys: set[str] = set()
 
-        extractions: list[Extraction] = []
+        pipeline = self.connection.pipeline(transaction=False)
 
-        for tracked_extraction_key in tracked_extraction_keys:
+        for tracked_extraction_key in self.connection.sscan_iter(tracking_keys_key,
+                                                                 count=self._REDIS_SCAN_COUNT):
 
-            raw = self.connection.hgetall(
-                f"{self._REDIS_TRACKING_DATA_PREFIX}{tracked_extraction_key}")
+            # SSCAN may return a member more than once if the set is resized mid-scan.
+            if tracked_extraction_key in seen_tracked_extraction_keys:
+                continue
 
-            extraction = Extraction(**raw)
+            seen_tracked_extraction_keys.add(tracked_extraction_key)
 
-            extractions.append(extraction)
+            pipeline.hgetall(self._get_tracking_data_key(tracked_extraction_key))
 
-        return extractions
+            if len(pipeline) >= self._REDIS_PIPELINE_BATCH_SIZE:
+                raws.extend(pipeline.execute())
 
-    def check_path_tracked(self, path: pathlib.PurePath) -> bool:
+        raws.extend(pipeline.execute())
+
+        return _EXTRACTION_LIST_ADAPTER.validate_python(raws)
+
+    def check_path_tracked(self, path: str) -> bool:
         """Check if a path is part of a tracked Extraction.
 
         Args:
-            path (pathlib.PurePath): Path to check.
+            path (str): Path to check.
 
         Returns:
             bool: Whether or not it belongs to a tracked Extraction.
         """
-        return bool(self.connection.sismember(self._REDIS_TRACKING_KEYS_KEY, str(path)))
+        return bool(self.connection.sismember(self._REDIS_TRACKING_KEYS_KEY, path))
 
-    def get_tracked_extraction_data_by_path(self, path: pathlib.PurePath) -> Extraction | None:
+    def get_tracked_extraction_data_by_path(self, path: str) -> Extraction | None:
         """Get tracked Extraction data for a given path.
 
         Args:
-            path (pathlib.PurePath): Path to get extraction for.
+            path (str): Path to get extraction for.
 
         Returns:
             Extraction | None: Extraction tracking data for path.
         """
-        if self.check_path_tracked(path):
-            raw = self.connection.hgetall(f"{self._REDIS_TRACKING_DATA_PREFIX}{path}")
-            return Extraction(**raw)
-        else:
-            return None
+        raw = self.connection.hgetall(self._get_tracking_data_key(path))
+
+        return self._parse_tracking_data(raw)
+
+    def _backfill_tracking_type_keys(self) -> None:
+        """Add extractions tracked before the per-type sets existed to the set for their type. Runs
+        once per Redis instance, and only once per process has seen it done.
+        """
+        if self.redis_instance in _BACKFILLED_REDIS_INSTANCES:
+            return
+
+        if not self.connection.exists(self._REDIS_TRACKING_TYPE_KEYS_BACKFILLED_KEY):
+
+            for script_params in self._iter_backfill_tracking_type_keys_script_params(
+                    self.connection.sscan_iter(self._REDIS_TRACKING_KEYS_KEY,
+                                               count=self._REDIS_SCAN_COUNT)):
+                self._backfill_tracking_type_keys_script(**script_params)
+
+            self.connection.set(self._REDIS_TRACKING_TYPE_KEYS_BACKFILLED_KEY, 1)
+
+        _BACKFILLED_REDIS_INSTANCES.add(self.redis_instance)
 
     def get_tracked_extraction_data_by_type(self,
                                             extraction_type: ExtractionType) -> list[Extraction]:
@@ -166,10 +351,10 @@ class RedisGingkoTrackingClient(GingkoTrackingClient):
         Returns:
             list[Extraction]: List of extractions of the provided type.
         """
-        tracked_extractions = self.get_tracked_extractions()
-        return [
-            extraction for extraction in tracked_extractions if extraction.type == extraction_type
-        ]
+        self._backfill_tracking_type_keys()
+
+        return self._get_tracked_extraction_data_by_keys(
+            self._get_tracking_type_keys_key(extraction_type))
 
     def remove_tracking_for_extraction(self, extraction: Extraction):
         """Remove an extraction from the tracking system.
@@ -177,15 +362,9 @@ class RedisGingkoTrackingClient(GingkoTrackingClient):
         Args:
             extraction (Extraction): Extraction to remove.
         """
-        extraction_path = extraction.path
-
-        if not self.check_path_tracked(extraction_path):
-            return
-
-        tracked_extraction_key = f"{self._REDIS_TRACKING_DATA_PREFIX}{str(extraction_path)}"
-
-        self.connection.delete(tracked_extraction_key)
-        self.connection.srem(self._REDIS_TRACKING_KEYS_KEY, str(extraction_path))
+        with self.connection.pipeline(transaction=True) as pipeline:
+            self._queue_tracking_removal(pipeline, extraction)
+            pipeline.execute()
 
     def add_tracking_for_extraction(self, extraction: Extraction) -> None:
         """Add an Extraction to the tracking system.
@@ -194,17 +373,158 @@ class RedisGingkoTrackingClient(GingkoTrackingClient):
             extraction (Extraction): Extraction to track.
 
         Raises:
-            Exception: _description_
+            ExtractionAlreadyTrackedError: Raised if an extraction with the same path is already
+            tracked.
         """
+        if not self._add_tracking_script(**self._get_add_tracking_script_params(extraction)):
+            raise ExtractionAlreadyTrackedError(extraction)
 
-        extraction_path = extraction.path
-        tracked_extraction_key = f"{self._REDIS_TRACKING_DATA_PREFIX}{str(extraction_path)}"
 
-        if self.check_path_tracked(extraction_path):
-            raise ExtractionAlreadyTrackedError(extraction)
+class AsyncRedisGingkoTrackingClient(_RedisTrackingLayout, AsyncGingkoTrackingClient):
+    """Asyncio counterpart to RedisGingkoTrackingClient, for use from async route handlers so that
+    Redis round-trips don't tie up a worker thread each. Shares its data layout with
+    RedisGingkoTrackingClient."""
+
+    def __init__(self, host: str = GINGKO_REDIS_HOST, port: int = GINGKO_REDIS_PORT) -> None:
+        """Constructor for the class.
+
+        Args:
+            host (str, optional): Hostname where Redis can be found. Defaults to GINGKO_REDIS_HOST.
+            port (int, optional): Port that Redis is running on. Defaults to GINGKO_REDIS_PORT.
+        """
+        self.redis_instance = (host, int(port))
+        self.connection = redis.asyncio.StrictRedis(
+            connection_pool=_get_async_redis_connection_pool(host, int(port)))
+        self._add_tracking_script = self.connection.register_script(_ADD_TRACKING_SCRIPT)
+        self._backfill_tracking_type_keys_script = self.connection.register_script(
+            _BACKFILL_TRACKING_TYPE_KEYS_SCRIPT)
+
+    async def get_tracked_extractions(self) -> list[Extraction]:
+        """Get a list of all tracked extractions.
+
+        Returns:
+            list[Extraction]: All extractions that are currently tracked.
+        """
+        return await self._get_tracked_extraction_data_by_keys(self._REDIS_TRACKING_KEYS_KEY)
+
+    async def _get_tracked_extraction_data_by_keys(self,
+                                                   tracking_keys_key: str) -> list[Extraction]:
+        """Get tracked Extraction data for every tracking key in a set, see
+        RedisGingkoTrackingClient._get_tracked_extraction_data_by_keys.
 
-        extraction_dict = dict(extraction)
-        extraction_dict["path"] = str(extraction.path)
+        Args:
+            tracking_keys_key (str): Key of the Redis set holding the tracking keys (extraction
+            paths) to get data for.
+
+        Returns:
+            list[Extraction]: Extraction tracking data for each key.
+        """
+        raws: list[dict[str, str]] = []
+        seen_tracked_extraction_keys: set[str] = set()
+
+        async with self.connection.pipeline(transaction=False) as pipeline:
+
+            async for tracked_extraction_key in self.connection.sscan_iter(
+                    tracking_keys_key, count=self._REDIS_SCAN_COUNT):
+
+                # SSCAN may return a member more than once if the set is resized mid-scan.
+                if tracked_extraction_key in seen_tracked_extraction_keys:
+                    continue
+
+                seen_tracked_extraction_keys.add(tracked_extraction_key)
+
+                pipeline.hgetall(self._get_tracking_data_key(tracked_extraction_key))
+
+                if len(pipeline) >= self._REDIS_PIPELINE_BATCH_SIZE:
+                    raws.extend(await pipeline.execute())
+
+            raws.extend(await pipeline.execute())
+
+        return _EXTRACTION_LIST_ADAPTER.validate_python(raws)
+
+    async def check_path_tracked(self, path: str) -> bool:
+        """Check if a path is part of a tracked Extraction.
+
+        Args:
+            path (str): Path to check.
 
-        self.connection.sadd(self._REDIS_TRACKING_KEYS_KEY, str(extraction_path))
-        self.connection.hset(tracked_extraction_key, mapping=extraction_dict)
+        Returns:
+            bool: Whether or not it belongs to a tracked Extraction.
+        """
+        return bool(await self.connection.sismember(self._REDIS_TRACKING_KEYS_KEY, path))
+
+    async def get_tracked_extraction_data_by_path(self, path: str) -> Extraction | None:
+        """Get tracked Extraction data for a given path.
+
+        Args:
+            path (str): Path to get extraction for.
+
+        Returns:
+            Extraction | None: Extraction tracking data for path.
+        """
+        raw = await self.connection.hgetall(self._get_tracking_data_key(path))
+
+        return self._parse_tracking_data(raw)
+
+    async def _backfill_tracking_type_keys(self) -> None:
+        """Add extractions tracked before the per-type sets existed to the set for their type, see
+        RedisGingkoTrackingClient._backfill_tracking_type_keys.
+        """
+        if self.redis_instance in _BACKFILLED_REDIS_INSTANCES:
+            return
+
+        if not await self.connection.exists(self._REDIS_TRACKING_TYPE_KEYS_BACKFILLED_KEY):
+
+            # The backfill runs once per Redis instance, so the paths are gathered up front rather
+            # than batched as they're scanned.
+            tracked_extraction_keys = [
+                tracked_extraction_key
+                async for tracked_extraction_key in self.connection.sscan_iter(
+                    self._REDIS_TRACKING_KEYS_KEY, count=self._REDIS_SCAN_COUNT)
+            ]
+
+            for script_params in self._iter_backfill_tracking_type_keys_script_params(
+                    tracked_extraction_keys):
+                await self._backfill_tracking_type_keys_script(**script_params)
+
+            await self.connection.set(self._REDIS_TRACKING_TYPE_KEYS_BACKFILLED_KEY, 1)
+
+        _BACKFILLED_REDIS_INSTANCES.add(self.redis_instance)
+
+    async def get_tracked_extraction_data_by_type(
+            self, extraction_type: ExtractionType) -> list[Extraction]:
+        """Get extraction data for all extractions of a specific type.
+
+        Args:
+            extraction_type (ExtractionType): The type to get extractions of.
+
+        Returns:
+            list[Extraction]: List of extractions of the provided type.
+        """
+        await self._backfill_tracking_type_keys()
+
+        return await self._get_tracked_extraction_data_by_keys(
+            self._get_tracking_type_keys_key(extraction_type))
+
+    async def remove_tracking_for_extraction(self, extraction: Extraction):
+        """Remove an extraction from the tracking system.
+
+        Args:
+            extraction (Extraction): Extraction to remove.
+        """
+        async with self.connection.pipeline(transaction=True) as pipeline:
+            self._queue_tracking_removal(pipeline, extraction)
+            await pipeline.execute()
+
+    async def add_tracking_for_extraction(self, extraction: Extraction) -> None:
+        """Add an Extraction to the tracking system.
+
+        Args:
+            extraction (Extraction): Extraction to track.
+
+        Raises:
+            ExtractionAlreadyTrackedError: Raised if an extraction with the same path is already
+            tracked.
+        """
+        if not await self._add_tracking_script(**self._get_add_tracking_script_params(extraction)):
+            raise ExtractionAlreadyTrackedError(extraction)
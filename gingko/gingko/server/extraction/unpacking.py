@@ -2,16 +2,24 @@
 objects with metadata."""
 
 import abc
+import concurrent.futures
+import dataclasses
+import functools
 import hashlib
-import pathlib
+import itertools
+import os
+import queue
 import tarfile
+import threading
 import typing
 import zipfile
 
-import pydantic
 import ssdeep
+import tlsh
 
-from gingko.server.extraction.model import Extraction, ExtractionType
+from gingko.config import (GINGKO_HASH_CHUNK_SIZE, GINGKO_UNPACKER_SSDEEP, GINGKO_UNPACKER_TLSH,
+                           GINGKO_UNPACKER_WORKERS)
+from gingko.server.extraction.model import Extraction, ExtractionType, normalise_path
 
 UnpackedExtractionObjectType = typing.Literal["directory", "file"]
 
@@ -19,7 +27,8 @@ UnpackedExtractionObjectType = typing.Literal["directory", "file"]
 class UnpackedExtractionFileMetadata(typing.TypedDict):
     md5: str
     sha1: str
-    ssdeep: str
+    tlsh: typing.NotRequired[str]
+    ssdeep: typing.NotRequired[str]
     size: int
 
 
@@ -27,14 +36,101 @@ class UnpackedExtractionDirectoryMetadata(typing.TypedDict):
     ...
 
 
-class UnpackedExtractionObject(pydantic.BaseModel):
+# Built once per unpacked object, so this is a plain dataclass rather than a pydantic model to keep
+# validation out of the unpacking loop.
+@dataclasses.dataclass(slots=True, frozen=True)
+class UnpackedExtractionObject:
     type: UnpackedExtractionObjectType
-    path: pathlib.PurePath
+    path: str
     metadata: UnpackedExtractionFileMetadata | UnpackedExtractionDirectoryMetadata
 
 
 class ExtractionUnpacker(abc.ABC):
 
+    # Objects are handed to workers in batches, so that for extractions of many small files the
+    # time goes on hashing rather than on scheduling a task per file.
+    _MAX_UNPACK_BATCH_SIZE = 32
+    # Batches are sized so each worker still gets several, which keeps small extractions spread
+    # across the pool and evens out batches that take longer than others.
+    _UNPACK_BATCHES_PER_WORKER = 4
+
+    # Digest tlsh.hash gives for input too short or too uniform to have a TLSH.
+    _TLSH_NULL_DIGEST = "TNULL"
+
+    def __init__(self,
+                 workers: int = GINGKO_UNPACKER_WORKERS,
+                 generate_tlsh: bool = GINGKO_UNPACKER_TLSH,
+                 generate_ssdeep: bool = GINGKO_UNPACKER_SSDEEP) -> None:
+        self.workers = workers
+        self.generate_tlsh = generate_tlsh
+        self.generate_ssdeep = generate_ssdeep
+
+    def _unpack_objects_in_parallel(
+            self, unpack_object: typing.Callable[[typing.Any], UnpackedExtractionObject],
+            objects: typing.Iterable[typing.Any]) -> list[UnpackedExtractionObject]:
+
+        def unpack_batch(batch: tuple) -> list[UnpackedExtractionObject]:
+            return [unpack_object(obj) for obj in batch]
+
+        objects = list(objects)
+
+        batches = self.workers * self._UNPACK_BATCHES_PER_WORKER
+        batch_size = min(self._MAX_UNPACK_BATCH_SIZE, max(1, len(objects) // batches))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+            unpacked_batches = executor.map(unpack_batch, itertools.batched(objects, batch_size))
+            return [unpacked_obj for batch in unpacked_batches for unpacked_obj in batch]
+
+    def _generate_file_metadata(self, file_fp: typing.BinaryIO) -> UnpackedExtractionFileMetadata:
+        return self._generate_chunks_metadata(
+            iter(functools.partial(file_fp.read, GINGKO_HASH_CHUNK_SIZE), b""))
+
+    def _generate_chunks_metadata(self,
+                                  chunks: typing.Iterable[bytes]) -> UnpackedExtractionFileMetadata:
+        md5_hash = hashlib.md5()
+        sha1_hash = hashlib.sha1()
+        # ssdeep is the default similarity hash, as it releases the GIL and TLSH doesn't.
+        tlsh_hash = tlsh.Tlsh() if self.generate_tlsh else None
+        ssdeep_hash = ssdeep.Hash() if self.generate_ssdeep else None
+        size = 0
+
+        # Every hash is fed each chunk in turn, so the file is only read once.
+        hash_updates = [md5_hash.update, sha1_hash.update]
+
+        if tlsh_hash is not None:
+            hash_updates.append(tlsh_hash.update)
+
+        if ssdeep_hash is not None:
+            hash_updates.append(ssdeep_hash.update)
+
+        for chunk in chunks:
+            for hash_update in hash_updates:
+                hash_update(chunk)
+            size += len(chunk)
+
+        file_metadata: UnpackedExtractionFileMetadata = {
+            "md5": md5_hash.hexdigest(),
+            "sha1": sha1_hash.hexdigest(),
+            "size": size
+        }
+
+        if tlsh_hash is not None:
+            try:
+                tlsh_hash.final()
+                file_metadata["tlsh"] = tlsh_hash.hexdigest()
+            except ValueError:
+                file_metadata["tlsh"] = self._TLSH_NULL_DIGEST
+
+        if ssdeep_hash is not None:
+            file_metadata["ssdeep"] = ssdeep_hash.digest()
+
+        return file_metadata
+
+    def _generate_member_path(self, member_name: str) -> str:
+        # Members stored with absolute paths aren't given a second leading slash, and ".." segments
+        # are kept as they are, as with PurePath("/") / member_name.
+        return normalise_path("/" + member_name)
+
     @abc.abstractmethod
     def unpack_extraction(self, extraction: Extraction) -> UnpackedExtractionObject:
         ...
@@ -42,134 +138,194 @@ class ExtractionUnpacker(abc.ABC):
 
 class DirectoryExtractionUnpacker(ExtractionUnpacker):
 
-    def _generate_extraction_rel_path(self, extraction_path: pathlib.PurePath,
-                                      object_path: pathlib.PurePath) -> pathlib.PurePath:
-        return pathlib.Path("/") / object_path.relative_to(extraction_path)
+    def _iter_extraction_entries(self, extraction_path: str) -> typing.Iterator[os.DirEntry]:
+        # scandir entries carry their file type from the directory listing, so walking the tree
+        # doesn't cost a stat per entry the way building a Path and calling is_dir() on it does.
+        directory_paths = [extraction_path]
 
-    def unpack_extraction(self, extraction: Extraction) -> UnpackedExtractionObject:
+        while directory_paths:
+            with os.scandir(directory_paths.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        directory_paths.append(entry.path)
+                    yield entry
 
-        unpacked_extraction_objects: list[UnpackedExtractionObject] = []
-        extraction_path = pathlib.Path(extraction.path)
+    def _unpack_object(self, extraction_path_prefix_length: int,
+                       unpacked_object: os.DirEntry) -> UnpackedExtractionObject:
 
-        for unpacked_object in extraction_path.glob("**/*"):
+        # Every entry's path starts with the extraction path, so the path relative to the
+        # extraction is just what follows it.
+        extraction_rel_path = "/" + unpacked_object.path[extraction_path_prefix_length:]
 
-            unpacked_obj: UnpackedExtractionObject | None = None
+        if unpacked_object.is_dir():
 
-            if unpacked_object.is_dir():
+            return UnpackedExtractionObject(type="directory", path=extraction_rel_path, metadata={})
 
-                unpacked_obj = UnpackedExtractionObject(type="directory",
-                                                        path=self._generate_extraction_rel_path(
-                                                            extraction_path, unpacked_object),
-                                                        metadata={})
+        with open(unpacked_object.path, "rb") as file_fp:
 
-            else:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(file_fp.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
 
-                file_content = unpacked_object.read_bytes()
-                md5_hash = hashlib.md5(file_content).hexdigest()
-                sha1_hash = hashlib.sha1(file_content).hexdigest()
-                ssdeep_hash = ssdeep.hash(file_content)
-                size = len(file_content)
+            file_metadata = self._generate_file_metadata(file_fp)
 
-                unpacked_obj = UnpackedExtractionObject(type="file",
-                                                        path=self._generate_extraction_rel_path(
-                                                            extraction_path, unpacked_object),
-                                                        metadata={
-                                                            "md5": md5_hash,
-                                                            "sha1": sha1_hash,
-                                                            "size": size,
-                                                            "ssdeep": ssdeep_hash
-                                                        })
+        return UnpackedExtractionObject(type="file",
+                                        path=extraction_rel_path,
+                                        metadata=file_metadata)
 
-            unpacked_extraction_objects.append(unpacked_obj)
+    def unpack_extraction(self, extraction: Extraction) -> UnpackedExtractionObject:
 
-        return unpacked_extraction_objects
+        # Files are hashed independently of one another, so they're spread across the worker threads.
+        extraction_path_prefix_length = len(extraction.path.rstrip("/")) + 1
+
+        return self._unpack_objects_in_parallel(
+            functools.partial(self._unpack_object, extraction_path_prefix_length),
+            self._iter_extraction_entries(extraction.path))
 
 
 class TarExtractionUnpacker(ExtractionUnpacker):
 
+    # Members are read from the archive in order, so the buffers are sized for a sequential read.
+    _TAR_BUFFER_SIZE = 1024 * 1024
+    # Bounds how far decompression may run ahead of hashing, in chunks.
+    _CHUNK_QUEUE_SIZE = 8
+
+    _END_OF_MEMBER = object()
+    _END_OF_ARCHIVE = object()
+
+    def _read_extraction_tar(self, extraction: Extraction, chunk_queue: queue.Queue,
+                             stop_reading: threading.Event) -> None:
+        # Puts each member on the queue, followed, for files, by the member's chunks and an end of
+        # member marker. An error reading the archive is put on the queue in place of the next
+        # item, and the archive always ends with an end of archive marker.
+        try:
+
+            with open(extraction.path, "rb", buffering=self._TAR_BUFFER_SIZE) as tar_fp, \
+                    tarfile.open(fileobj=tar_fp, mode="r|*",
+                                 bufsize=self._TAR_BUFFER_SIZE) as extraction_tar:
+
+                for member in extraction_tar:
+
+                    chunk_queue.put(member)
+
+                    if not member.isfile():
+                        continue
+
+                    with extraction_tar.extractfile(member) as member_fp:
+                        while not stop_reading.is_set() and (
+                                chunk := member_fp.read(GINGKO_HASH_CHUNK_SIZE)):
+                            chunk_queue.put(chunk)
+
+                    chunk_queue.put(self._END_OF_MEMBER)
+
+                    if stop_reading.is_set():
+                        return
+
+        except BaseException as e:
+            chunk_queue.put(e)
+
+        finally:
+            chunk_queue.put(self._END_OF_ARCHIVE)
+
     def unpack_extraction(self, extraction: Extraction) -> UnpackedExtractionObject:
 
-        extraction_tar = tarfile.open(extraction.path)
+        # Tar members can only be read one after another, but decompressing the archive and hashing
+        # its members don't have to wait on one another. The archive is read on its own thread, up
+        # to a bounded number of chunks ahead of the hashing done here.
+        chunk_queue: queue.Queue = queue.Queue(maxsize=self._CHUNK_QUEUE_SIZE)
+        stop_reading = threading.Event()
 
-        members = extraction_tar.getmembers()
+        def get_item() -> typing.Any:
+            item = chunk_queue.get()
+
+            if isinstance(item, BaseException):
+                raise item
+
+            return item
 
         unpacked_extraction_objects: list[UnpackedExtractionObject] = []
 
-        for member in members:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+
+            reading = executor.submit(self._read_extraction_tar, extraction, chunk_queue,
+                                      stop_reading)
 
-            extraction_object: UnpackedExtractionObject | None = None
+            try:
 
-            if member.isfile():
+                while (member := get_item()) is not self._END_OF_ARCHIVE:
 
-                member_content = extraction_tar.extractfile(member).read()
+                    if member.isfile():
 
-                md5_hash = hashlib.md5(member_content).hexdigest()
-                sha1_hash = hashlib.sha1(member_content).hexdigest()
-                ssdeep_hash = ssdeep.hash(member_content)
-                size = len(member_content)
+                        member_metadata = self._generate_chunks_metadata(
+                            iter(get_item, self._END_OF_MEMBER))
 
-                extraction_object = UnpackedExtractionObject(type="file",
-                                                             path=pathlib.PurePath("/") /
-                                                             member.path,
-                                                             metadata={
-                                                                 "md5": md5_hash,
-                                                                 "sha1": sha1_hash,
-                                                                 "size": size,
-                                                                 "ssdeep": ssdeep_hash
-                                                             })
+                        extraction_object = UnpackedExtractionObject(
+                            type="file",
+                            path=self._generate_member_path(member.name),
+                            metadata=member_metadata)
 
-            else:
+                    else:
 
-                extraction_object = UnpackedExtractionObject(type="directory",
-                                                             path=pathlib.PurePath("/") /
-                                                             member.path,
-                                                             metadata={})
+                        extraction_object = UnpackedExtractionObject(
+                            type="directory",
+                            path=self._generate_member_path(member.name),
+                            metadata={})
 
-            unpacked_extraction_objects.append(extraction_object)
+                    unpacked_extraction_objects.append(extraction_object)
+
+            finally:
+                # If hashing failed the reader may be blocked on a full queue, so it's told to stop
+                # and the queue drained until it has.
+                stop_reading.set()
+
+                while not reading.done():
+                    try:
+                        chunk_queue.get(timeout=0.1)
+                    except queue.Empty:
+                        pass
 
         return unpacked_extraction_objects
 
 
 class ZipExtractionUnpacker(ExtractionUnpacker):
 
-    def unpack_extraction(self, extraction: Extraction) -> UnpackedExtractionObject:
+    def _unpack_member(self, extraction_zip: zipfile.ZipFile,
+                       member: zipfile.ZipInfo) -> UnpackedExtractionObject:
 
-        extraction_zip = zipfile.ZipFile(extraction.path)
+        if member.is_dir():
 
-        members = extraction_zip.filelist
+            return UnpackedExtractionObject(type="directory",
+                                            path=self._generate_member_path(member.filename),
+                                            metadata={})
 
-        unpacked_extraction_objects: list[UnpackedExtractionObject] = []
+        with extraction_zip.open(member) as member_fp:
+            member_metadata = self._generate_file_metadata(member_fp)
 
-        for member in members:
+        return UnpackedExtractionObject(type="file",
+                                        path=self._generate_member_path(member.filename),
+                                        metadata=member_metadata)
 
-            extraction_object: UnpackedExtractionObject | None = None
+    def unpack_extraction(self, extraction: Extraction) -> UnpackedExtractionObject:
 
-            if member.is_dir():
+        with zipfile.ZipFile(extraction.path) as extraction_zip:
+            members = extraction_zip.filelist
 
-                extraction_object = UnpackedExtractionObject(type="directory",
-                                                             path=pathlib.PurePath("/") /
-                                                             member.filename,
-                                                             metadata={})
+        # Zip members can be read independently, but a ZipFile shouldn't be shared between threads,
+        # so each worker thread opens its own handle on the archive.
+        worker_zips = threading.local()
+        opened_zips: list[zipfile.ZipFile] = []
 
-            else:
+        def unpack_member(member: zipfile.ZipInfo) -> UnpackedExtractionObject:
 
-                member_content = extraction_zip.read(member)
+            if not hasattr(worker_zips, "extraction_zip"):
+                worker_zips.extraction_zip = zipfile.ZipFile(extraction.path)
+                opened_zips.append(worker_zips.extraction_zip)
 
-                md5_hash = hashlib.md5(member_content).hexdigest()
-                sha1_hash = hashlib.sha1(member_content).hexdigest()
-                ssdeep_hash = ssdeep.hash(member_content)
-                size = len(member_content)
+            return self._unpack_member(worker_zips.extraction_zip, member)
 
-                extraction_object = UnpackedExtractionObject(type="file",
-                                                             path=pathlib.PurePath("/") /
-                                                             member.filename,
-                                                             metadata={
-                                                                 "md5": md5_hash,
-                                                                 "sha1": sha1_hash,
-                                                                 "size": size,
-                                                                 "ssdeep": ssdeep_hash
-                                                             })
+        try:
 
-            unpacked_extraction_objects.append(extraction_object)
+            return self._unpack_objects_in_parallel(unpack_member, members)
 
-        return unpacked_extraction_objects
+        finally:
+            for extraction_zip in opened_zips:
+                extraction_zip.close()
@@ -1,15 +1,18 @@
 """Module containing functionality for the directory watcher."""
 
+import concurrent.futures
 import logging
+import os
 import pathlib
+import signal
 import tarfile
-import time
+import threading
 import zipfile
 
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEvent, FileSystemEventHandler, FileCreatedEvent, DirCreatedEvent
 
-from gingko.config import GINGKO_INPUT_DIR
+from gingko.config import GINGKO_INPUT_DIR, GINGKO_WATCHER_WORKERS
 from gingko.server.extraction.model import Extraction
 from gingko.server.extraction.tracking import GingkoTrackingClient, ExtractionAlreadyTrackedError
 
@@ -17,22 +20,30 @@ from gingko.server.extraction.tracking import GingkoTrackingClient, ExtractionAl
 class GingkoFileSystemEventHandler(FileSystemEventHandler):
     """File system event handler for the Gingko system, specifically the watcher."""
 
-    _VALID_FILE_EXTRACTION_EXTENSIONS: list[str] = [".tar", ".tar.gz", ".zip"]
+    _VALID_FILE_EXTRACTION_EXTENSIONS: frozenset[str] = frozenset({".tar", ".tar.gz", ".zip"})
     _FILE_EXTRACTION_EXTENSION_TO_EXTRACTION_TYPE_MAP = {
         ".tar": "tar",
         ".tar.gz": "tar",
         ".zip": "zip"
     }
+    _TAR_COUNT_BUFFER_SIZE = 1024 * 1024
 
-    def __init__(self, gingko_tracking_client: GingkoTrackingClient) -> None:
+    def __init__(self,
+                 gingko_tracking_client: GingkoTrackingClient,
+                 workers: int = GINGKO_WATCHER_WORKERS) -> None:
         """Contstructor for the GingkoFileSystemEventHandler.
 
         Args:
             gingko_tracking_client (GingkoTrackingClient): Tracking client to use when new
             extractions are encountered by the watcher.
+            workers (int): Number of threads used to handle new extractions.
         """
         self.gingko_tracking_client = gingko_tracking_client
 
+        # Counting the files in an extraction can mean decompressing all of it, so extractions are
+        # handled off the observer thread, which is left free to keep draining events.
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=workers)
+
     def handle_zip_extraction_file(self, zip_extraction: pathlib.Path) -> Extraction:
         """Handler for an extraction of type Zip.
 
@@ -45,7 +56,7 @@ class GingkoFileSystemEventHandler(FileSystemEventHandler):
 
         with zipfile.ZipFile(zip_extraction, "r") as z_fp:
 
-            return Extraction(path=pathlib.PurePath(zip_extraction),
+            return Extraction(path=str(zip_extraction),
                               type="zip",
                               size_on_disk=zip_extraction.stat().st_size,
                               files=len(z_fp.filelist))
@@ -60,14 +71,17 @@ class GingkoFileSystemEventHandler(FileSystemEventHandler):
             Extraction: Extraction derived from tar file path.
         """
 
-        mode = "r:" if tar_extraction.suffix == ".tar" else "r:gz"
+        # Members are only counted, so the archive is read front to back as a stream through a
+        # large buffer rather than seeking from header to header.
+        mode = "r|" if tar_extraction.suffix.lower() == ".tar" else "r|gz"
 
-        with tarfile.open(str(tar_extraction), mode) as t_fp:
+        with tar_extraction.open("rb", buffering=self._TAR_COUNT_BUFFER_SIZE) as tar_fp, \
+                tarfile.open(fileobj=tar_fp, mode=mode) as t_fp:
 
-            return Extraction(path=pathlib.PurePath(tar_extraction),
+            return Extraction(path=str(tar_extraction),
                               type="tar",
                               size_on_disk=tar_extraction.stat().st_size,
-                              files=len(t_fp.getmembers()))
+                              files=sum(1 for _ in t_fp))
 
     def handle_directory_extraction(self, directory_extraction: pathlib.Path) -> Extraction:
         """Handler for extractions of type directory.
@@ -79,9 +93,11 @@ class GingkoFileSystemEventHandler(FileSystemEventHandler):
             Extraction: Extraction derived from provided directory.
         """
 
-        files = len(list(directory_extraction.glob("**/*")))
+        files = sum(
+            len(dir_names) + len(file_names)
+            for _, dir_names, file_names in os.walk(directory_extraction))
 
-        return Extraction(path=pathlib.PurePath(directory_extraction),
+        return Extraction(path=str(directory_extraction),
                           type="directory",
                           size_on_disk=directory_extraction.stat().st_size,
                           files=files)
@@ -95,15 +111,20 @@ class GingkoFileSystemEventHandler(FileSystemEventHandler):
         Raises:
             NotImplemented: Raised in the event that there is no valid handler for that file type.
         """
-        event_file_path = pathlib.Path(event.src_path).resolve()
+        # Most files seen aren't extractions, so they're filtered on the plain file name before
+        # anything more expensive, like resolving the path, is done.
+        file_name = os.path.basename(event.src_path).lower()
 
-        file_extension = "".join(event_file_path.suffixes)
+        file_extension = next((extension for extension in self._VALID_FILE_EXTRACTION_EXTENSIONS
+                               if file_name.endswith(extension)), None)
 
-        if file_extension not in self._VALID_FILE_EXTRACTION_EXTENSIONS:
+        if file_extension is None:
             logging.info("skipping file %s as doesn't look like extraction (wrong file ext)",
-                         event_file_path)
+                         event.src_path)
             return
 
+        event_file_path = pathlib.Path(event.src_path).resolve()
+
         extraction_type = self._FILE_EXTRACTION_EXTENSION_TO_EXTRACTION_TYPE_MAP[file_extension]
 
         match extraction_type:
@@ -153,6 +174,15 @@ class GingkoFileSystemEventHandler(FileSystemEventHandler):
             logging.warning("skipping extraction %s, already in tracker", extraction.path)
             return
 
+    def _log_handler_error(self, future: concurrent.futures.Future) -> None:
+        """Done callback that logs any error raised while handling an event.
+
+        Args:
+            future (concurrent.futures.Future): Future of the finished handler.
+        """
+        if (error := future.exception()) is not None:
+            logging.error("failed to handle new extraction", exc_info=error)
+
     def on_created(self, event: FileSystemEvent) -> None:
         """Handler for all file system events, of type FileCreatedEvent of DirCreatedEvent.
 
@@ -160,9 +190,17 @@ class GingkoFileSystemEventHandler(FileSystemEventHandler):
             event (FileSystemEvent): The file system event.
         """
         if isinstance(event, FileCreatedEvent):
-            self.handle_potential_extraction_file(event)
+            future = self.executor.submit(self.handle_potential_extraction_file, event)
         elif isinstance(event, DirCreatedEvent):
-            self.handle_potential_extraction_directory(event)
+            future = self.executor.submit(self.handle_potential_extraction_directory, event)
+        else:
+            return
+
+        future.add_done_callback(self._log_handler_error)
+
+    def shutdown(self) -> None:
+        """Waits for extractions already picked up to be handled, then stops the handler."""
+        self.executor.shutdown(wait=True)
 
 
 class GingkoDirectoryWatcher:
@@ -185,19 +223,31 @@ class GingkoDirectoryWatcher:
         self.obs = Observer()
         self.obs.schedule(self.gingko_file_system_event_handler, self.watch_dir, recursive=False)
 
+        self._stop_event = threading.Event()
+
+    def stop(self) -> None:
+        """Asks a running watcher to stop."""
+        self._stop_event.set()
+
     def start(self) -> None:
-        """Starts the watcher's watch."""
+        """Starts the watcher's watch, and blocks until the watcher is stopped, either by stop() or
+        by SIGINT or SIGTERM when started from the main thread."""
         logging.info("starting extraction directory watcher (watching: %s)", self.watch_dir)
 
+        # Signal handlers can only be installed from the main thread. Started from any other
+        # thread, the watcher is left to be stopped with stop().
+        if threading.current_thread() is threading.main_thread():
+            for signal_number in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(signal_number, lambda *_: self.stop())
+
         self.obs.start()
 
         try:
 
-            while True:
-
-                time.sleep(1)
+            self._stop_event.wait()
 
         finally:
             logging.info("gracefully stopping directory watcher...")
             self.obs.stop()
             self.obs.join()
+            self.gingko_file_system_event_handler.shutdown()